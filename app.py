@@ -1,10 +1,12 @@
 # app.py - Grid Bot Simulator
 # Stabile Version
 
+import time
 import streamlit as st
-from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
 from components.ui import get_user_settings, render_chart_and_metrics, display_bot_results, plot_simulation_pattern
-from services.bitget_api import fetch_bitget_candles
+from services.bitget_api import fetch_bitget_candles_cached
 from services.bot import simulate_grid_bot  # Geändert: calculate_grid_lines entfernt
 from services.simulator import generate_simulated_data
 
@@ -12,9 +14,98 @@ from services.simulator import generate_simulated_data
 st.set_page_config(page_title="Grid Bot Simulator", layout="wide")
 st.title("📈 Grid Bot Simulator (Spot)")
 
+
+# Kerzen-Cache: Reruns (Slider, Checkboxen) lösen keinen neuen API-Call aus.
+# Die Gültigkeit richtet sich nach der Kerzenlänge: cache_bucket wechselt einmal pro
+# Intervall, danach wird neu geladen (ttl räumt alte Einträge auf).
+# cache_resource spart das Pickeln des DataFrames bei jedem Rerun; der DataFrame wird
+# dafür zwischen Reruns geteilt und darf nicht in-place verändert werden (ggf. .copy()).
+CANDLE_CACHE_SECONDS = {
+    "1m": 60,
+    "5m": 5 * 60,
+    "15m": 15 * 60,
+    "1h": 60 * 60,
+    "4h": 4 * 60 * 60,
+    "1d": 24 * 60 * 60,
+}
+
+
+class CandleFetchError(Exception):
+    pass
+
+
+# Fehler werden als Exception weitergereicht: cache_resource speichert keine Exceptions,
+# ein fehlgeschlagener Abruf wird beim nächsten Rerun also erneut versucht
+@st.cache_resource(ttl=24 * 60 * 60, max_entries=32, show_spinner=False)
+def _cached_fetch(coin, interval, start_date, end_date, max_bars, cache_bucket):
+    symbol, df, error = fetch_bitget_candles_cached(coin, interval, start_date, end_date, max_bars)
+    if error:
+        raise CandleFetchError(error)
+    return symbol, df
+
+
+# Vorladen der Nachbar-Zeiträume (±1 Tag) im Hintergrund: Der Abruf füllt den
+# Disk-Cache, sodass das nächste Verschieben des Datumsbereichs ohne API-Call auskommt.
+# Zwei Worker, um das Rate-Limit von Bitget nicht auszureizen; lange Zeiträume (mehrere
+# Seiten) werden darin seriell geladen, damit nicht jeder Worker weitere Threads startet.
+PREFETCH_SHIFT = timedelta(days=1)
+
+
+@st.cache_resource(show_spinner=False)
+def _prefetch_executor():
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="candle-prefetch")
+
+
+def _prefetch_neighbors(coin, interval, start_date, end_date, max_bars):
+    today = datetime.now(timezone.utc).date()
+    executor = _prefetch_executor()
+    for shift in (-PREFETCH_SHIFT, PREFETCH_SHIFT):
+        # Nur abgeschlossene Zeiträume landen im Disk-Cache
+        if end_date + shift >= today:
+            continue
+        executor.submit(fetch_bitget_candles_cached, coin, interval,
+                        start_date + shift, end_date + shift, max_bars, max_workers=1)
+
+
+# Parameter von simulate_grid_bot mit Ziel-Typ (Werte kommen aus den Sidebar-Widgets)
+SIM_PARAM_TYPES = {
+    "total_investment": float,
+    "lower_price": float,
+    "upper_price": float,
+    "num_grids": int,
+    "grid_mode": str,
+    "fee_rate": float,
+    "reserve_pct": float,
+}
+
+
+# Simulation nur neu rechnen, wenn sich Daten oder Bot-Parameter geändert haben.
+# st.cache_data hasht den DataFrame selbst und liefert pro Aufruf eine Kopie zurück.
+@st.cache_data(max_entries=16, show_spinner=False)
+def _cached_simulate(df, total_investment, lower_price, upper_price, num_grids, grid_mode, fee_rate, reserve_pct):
+    return simulate_grid_bot(
+        df=df,
+        total_investment=total_investment,
+        lower_price=lower_price,
+        upper_price=upper_price,
+        num_grids=num_grids,
+        grid_mode=grid_mode,
+        fee_rate=fee_rate,
+        reserve_pct=reserve_pct
+    )
+
+
+# Wie beim Kerzen-Cache: cache_resource liefert bei jedem Rerun denselben DataFrame,
+# damit die identitätsbasierten Caches (Chart, Kennzahlen) greifen
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _cached_simulated_data(pattern, days, initial_price, volatility, seed=0):
+    return generate_simulated_data(pattern=pattern, days=days, initial_price=initial_price,
+                                   volatility=volatility, seed=seed)
+
+
 # Initialize session state
-if 'prev_settings' not in st.session_state:
-    st.session_state.prev_settings = None
+if 'prev_settings_revision' not in st.session_state:
+    st.session_state.prev_settings_revision = None
 if 'results' not in st.session_state:
     st.session_state.results = None
 
@@ -23,7 +114,7 @@ user_settings = get_user_settings()
 
 # Daten abrufen basierend auf Modus
 if user_settings.get("use_simulated_data", False):
-    df = generate_simulated_data(
+    df = _cached_simulated_data(
         pattern=user_settings["simulation_pattern"],
         days=user_settings["simulation_days"],
         initial_price=user_settings["simulation_initial_price"],
@@ -40,13 +131,21 @@ else:
     end_date = user_settings["end_date"]
     max_bars = user_settings["max_bars"]
     
-    symbol, df, error = fetch_bitget_candles(coin, interval, start_date, end_date, max_bars)
-    if error:
-        st.error(error)
+    cache_bucket = int(time.time() // CANDLE_CACHE_SECONDS.get(interval, 60))
+    try:
+        symbol, df = _cached_fetch(coin, interval, start_date, end_date, max_bars, cache_bucket)
+    except CandleFetchError as e:
+        st.error(str(e))
         st.stop()
 
-# Store DataFrame
-st.session_state["df"] = df
+    prefetch_key = (coin, interval, start_date, end_date, max_bars)
+    if st.session_state.get("_prefetch_key") != prefetch_key:
+        st.session_state["_prefetch_key"] = prefetch_key
+        _prefetch_neighbors(*prefetch_key)
+
+# Store DataFrame (nur bei neuem DataFrame, sonst identisches Objekt aus dem Cache)
+if st.session_state.get("df") is not df:
+    st.session_state["df"] = df
 
 # st.dataframe(df)  # interaktive Tabelle
 # Initial price for grid calculations
@@ -57,16 +156,26 @@ grid_lines = None
 if user_settings["enable_bot"]:
     bot_params = user_settings["bot_params"]
     try:
-        # Temporäre Instanz zur Grid-Berechnung
-        from services.bot import GridBot
-        dummy_bot = GridBot(
-            total_investment=10000,  # Dummy-Wert
-            lower_price=float(bot_params["lower_price"]),
-            upper_price=float(bot_params["upper_price"]),
-            num_grids=int(bot_params["num_grids"]),
-            grid_mode=str(bot_params["grid_mode"])
+        # Grid-Lines nur neu berechnen, wenn sich die Grid-Parameter geändert haben
+        grid_key = (
+            float(bot_params["lower_price"]),
+            float(bot_params["upper_price"]),
+            int(bot_params["num_grids"]),
+            str(bot_params["grid_mode"])
         )
-        grid_lines = dummy_bot.grid_lines  # Zugriff auf berechnete Grid-Lines
+        if st.session_state.get("_grid_key") != grid_key:
+            # Temporäre Instanz zur Grid-Berechnung
+            from services.bot import GridBot
+            dummy_bot = GridBot(
+                total_investment=10000,  # Dummy-Wert
+                lower_price=grid_key[0],
+                upper_price=grid_key[1],
+                num_grids=grid_key[2],
+                grid_mode=grid_key[3]
+            )
+            st.session_state["_grid_lines"] = dummy_bot.grid_lines  # Zugriff auf berechnete Grid-Lines
+            st.session_state["_grid_key"] = grid_key
+        grid_lines = st.session_state["_grid_lines"]
 
     # except Exception as e:
     #     st.error(f"Grid-Berechnungsfehler: {str(e)}")
@@ -77,9 +186,10 @@ if user_settings["enable_bot"]:
 
 
 # Settings change detection
-current_settings = {k: v for k, v in user_settings.items() if k != "bot_run_triggered"}
-if st.session_state.prev_settings != current_settings:
-    st.session_state.prev_settings = current_settings
+# (jede Widget-Änderung in der Sidebar erhöht settings_revision)
+current_revision = st.session_state.get("settings_revision", 0)
+if st.session_state.prev_settings_revision != current_revision:
+    st.session_state.prev_settings_revision = current_revision
     st.session_state.results = None
 
 # Grid Bot Simulation (angepasst für Error-Handling)
@@ -87,16 +197,8 @@ if user_settings["enable_bot"] and user_settings.get("bot_run_triggered", False)
     with st.spinner("Simulation läuft..."):
         try:
             bot_params = user_settings["bot_params"]
-            results = simulate_grid_bot(
-                df=df,
-                total_investment=float(bot_params["total_investment"]),
-                lower_price=float(bot_params["lower_price"]),
-                upper_price=float(bot_params["upper_price"]),
-                num_grids=int(bot_params["num_grids"]),
-                grid_mode=str(bot_params["grid_mode"]),
-                fee_rate=float(bot_params["fee_rate"]),
-                reserve_pct=float(bot_params["reserve_pct"])
-            )
+            sim_params = {key: cast(bot_params[key]) for key, cast in SIM_PARAM_TYPES.items()}
+            results = _cached_simulate(df=df, **sim_params)
             if results.get("error"):
                 st.error(f"Simulationsfehler: {results['error']}")
             else:
@@ -137,11 +239,8 @@ render_chart_and_metrics(
     df,
     symbol,
     interval,
-    user_settings["chart_type"],
-    user_settings["show_volume"],
     grid_lines=grid_lines,
     trade_log=trade_log,
-    show_grid_lines=user_settings.get("show_grid_lines", False),
     daily_values=daily_values
 )
 
@@ -6,8 +6,103 @@ import pandas as pd
 from datetime import date, timedelta, datetime
 import plotly.graph_objects as go
 import numpy as np
+import pyarrow as pa
 from services.bitget_api import fetch_bitget_candles
 
+def bump_settings_revision():
+    # Jede Widget-Änderung erhöht die Revision; app.py verwirft daraufhin alte Ergebnisse
+    st.session_state["settings_revision"] = st.session_state.get("settings_revision", 0) + 1
+
+
+def _cached_by_identity(key, obj, build, params=None):
+    # Ein Ergebnis pro Session-State-Schlüssel, gültig solange dieselben Objekte (Vergleich per
+    # Identität; mehrere Eingaben als Tupel) und gleiche Parameter vorliegen
+    objs = obj if isinstance(obj, tuple) else (obj,)
+    cached = st.session_state.get(key)
+    if (cached and len(cached[0]) == len(objs) and all(a is b for a, b in zip(cached[0], objs))
+            and cached[1] == params):
+        return cached[2]
+    value = build()
+    st.session_state[key] = (objs, params, value)
+    return value
+
+
+def first_last_close(df):
+    # Start-/Endkurs pro DataFrame nur einmal bestimmen
+    return _cached_by_identity(
+        "_close_bounds", df, lambda: (float(df["close"].iat[0]), float(df["close"].iat[-1]))
+    )
+
+
+def _dropna_values(df, col):
+    values = df[col].to_numpy(dtype=np.float64)
+    return values[~np.isnan(values)]
+
+
+def candle_stats(df):
+    # Kennzahlen pro Kerze in einem Durchgang über die NumPy-Arrays; wie first_last_close
+    # pro DataFrame gecacht, da Metriken und Volatilität dieselben Werte brauchen
+    return _cached_by_identity("_candle_stats", df, lambda: _compute_candle_stats(df))
+
+
+def _compute_candle_stats(df):
+    stats = {"range_mean": None, "change_mean": None, "change_mad": None, "change_std": None,
+             "high_max": df["high"].to_numpy().max(), "low_min": df["low"].to_numpy().min()}
+    if "range" in df:
+        rng = _dropna_values(df, "range")
+        stats["range_mean"] = rng.mean() if rng.size else np.nan
+    if "price_change" in df:
+        pc = _dropna_values(df, "price_change")
+        stats["change_mean"] = pc.mean() if pc.size else np.nan
+        stats["change_mad"] = np.abs(pc).mean() if pc.size else np.nan
+        stats["change_std"] = pc.std(ddof=1) if pc.size > 1 else np.nan
+    return stats
+
+
+def trade_log_frame(trade_log):
+    # Trade Log (Liste von Dicts) nur einmal pro Simulation in Spalten umwandeln;
+    # Chart-Marker und Trade-Tabelle teilen sich den DataFrame (nicht in-place ändern)
+    return _cached_by_identity("_trade_log_frame", trade_log, lambda: pd.DataFrame(trade_log))
+
+
+def candle_table(df):
+    # Kursdaten einmal pro DataFrame nach Arrow konvertieren; st.dataframe übernimmt die
+    # Arrow-Tabelle ohne erneute pandas → Arrow-Konvertierung bei jedem Rerun
+    return _cached_by_identity("_candle_table", df, lambda: pa.Table.from_pandas(
+        df[["timestamp", "open", "high", "low", "close", "volume", "range", "price_change"]],
+        preserve_index=False
+    ))
+
+
+# Ab dieser Punktzahl wird die Linien-Darstellung ausgedünnt (Candlesticks bleiben vollständig)
+LINE_MAX_POINTS = 500
+
+
+def lttb_indices(x, y, n_out):
+    # Largest-Triangle-Three-Buckets: wählt pro Bucket den Punkt mit der grössten
+    # Dreiecksfläche zum zuvor gewählten Punkt und zum Mittel des nächsten Buckets.
+    # Erster und letzter Punkt sowie Minimum und Maximum bleiben immer erhalten.
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, (edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x = x[nxt_lo:nxt_hi].mean()
+        avg_y = y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    # LTTB allein garantiert die Extremwerte nicht; sie werden zusätzlich aufgenommen
+    return np.union1d(idx, [np.argmin(y), np.argmax(y)])
+
+
 def get_user_settings():
     with st.sidebar:
         #version_placeholder = st.sidebar.empty()
@@ -17,10 +112,11 @@ def get_user_settings():
         # use_simulated = st.session_state.get("sim_toggle", False)
         # Synthetische Simulationsdaten sind aktuell deaktiviert - nicht mehr in der Sidebar
         # Da nicht klar, ob der Bot darauf funktioniert
-        use_simulated = st.checkbox("Simulationsdaten verwenden", False, key="sim_toggle",disabled=True)
+        use_simulated = st.checkbox("Simulationsdaten verwenden", False, key="sim_toggle",disabled=True, on_change=bump_settings_revision)
         
         # Callback zum automatischen Laden bei Eingabe der Währung
         def update_price_range():
+            bump_settings_revision()
             coin = st.session_state.get("coin_input", "BTC")
             symbol, df, error = fetch_bitget_candles(
                 coin=coin,
@@ -103,255 +199,240 @@ def get_user_settings():
                 "Volatil": "volatile",
                 "Mean Reverting": "mean_reverting"
             }
-            label = st.selectbox("Kursverlauf", list(patterns.keys()), index=0)
+            label = st.selectbox("Kursverlauf", list(patterns.keys()), index=0, on_change=bump_settings_revision)
             pattern = patterns[label]  # ← liefert intern z. B. "linear_up"
 
             init_price = st.number_input("Startkurs (USDT)", 
                                         value=100000.0, 
                                         step=1000.0,
-                                        key="sim_init_price")
-            sim_days = st.slider("Anzahl Tage", 1, 30, 7, key="sim_days")
-            volatility = st.slider("Volatilität", 1000, 20000, 5000, key="sim_vol")
+                                        key="sim_init_price",
+                                        on_change=bump_settings_revision)
+            sim_days = st.slider("Anzahl Tage", 1, 30, 7, key="sim_days", on_change=bump_settings_revision)
+            volatility = st.slider("Volatilität", 1000, 20000, 5000, key="sim_vol", on_change=bump_settings_revision)
         else:
             # Original market data inputs
             st.subheader("Marktdaten")
             #coin = st.text_input("Währung (COIN in USDT)", value="BTC", placeholder="e. g. BTC or ETH")
             
-            coin=st.selectbox(
-                "Währung (COIN in USDT)",
-                options=["BTC", "ETH", "SOL", "ADA", 
-                "AVAX", "BNB", "DOGE", "DOT", "ICP", "LINK", 
-                "LTC", "MATIC", "NEAR", "SHIB", "TON", "TRX", 
-                "UNI", "WBTC", "XRP", "XLM"],
-                index=0,
-                placeholder="Gib ein Symbol ein…",
-                key="coin_input",
-                on_change=update_price_range
-            )
+            # Marktdaten-Eingaben als Formular: Änderungen lösen erst beim Absenden
+            # einen Rerun (und ggf. einen API-Abruf) aus, nicht pro Widget
+            def apply_market_settings():
+                if st.session_state.get("coin_input") != st.session_state.get("_applied_coin", "BTC"):
+                    st.session_state["_applied_coin"] = st.session_state.get("coin_input")
+                    update_price_range()
+                else:
+                    bump_settings_revision()
+
+            with st.form("params", border=False):
+                coin=st.selectbox(
+                    "Währung (COIN in USDT)",
+                    options=["BTC", "ETH", "SOL", "ADA", 
+                    "AVAX", "BNB", "DOGE", "DOT", "ICP", "LINK", 
+                    "LTC", "MATIC", "NEAR", "SHIB", "TON", "TRX", 
+                    "UNI", "WBTC", "XRP", "XLM"],
+                    index=0,
+                    placeholder="Gib ein Symbol ein…",
+                    key="coin_input"
+                )
    
-            # coin = st.text_input(
-            #     "Währung (COIN in USDT)", 
-            #     value="BTC", 
-            #     key="coin_input", 
-            #     on_change=update_price_range
-            # )
-            interval = st.radio("Intervall", ["1m", "5m", "15m", "1h", "4h", "1d"], horizontal=True, index=3)
-            today = date.today()
-            start_date = st.date_input("Startdatum", today - timedelta(days=30))
-            end_date = st.date_input("Enddatum", today)
-            max_bars = st.slider("Anzahl Kerzen (10–1000)", 10, 1000, 1000)
-
-        # Common settings (both simulated and real data)
-        st.subheader("Chart Einstellungen")
-        chart_type = st.selectbox("Chart Typ", ["Candlestick", "Linie"], index=0)
-        show_volume = st.checkbox("Volumen anzeigen", True)
-        show_grid_lines = st.checkbox("Gridbereich anzeigen", False)  # NEW: Grid toggle
-        
+                # coin = st.text_input(
+                #     "Währung (COIN in USDT)", 
+                #     value="BTC", 
+                #     key="coin_input", 
+                #     on_change=update_price_range
+                # )
+                interval = st.radio("Intervall", ["1m", "5m", "15m", "1h", "4h", "1d"], horizontal=True, index=3)
+                today = date.today()
+                start_date = st.date_input("Startdatum", today - timedelta(days=30))
+                end_date = st.date_input("Enddatum", today)
+                max_bars = st.slider("Anzahl Kerzen (10–5000)", 10, 5000, 1000)
+                st.form_submit_button("Daten laden", on_click=apply_market_settings)
+
         # Grid bot settings
         st.subheader("Grid Bot Parameter")
-        enable_bot = st.checkbox("Grid Bot aktivieren", True)
+        enable_bot = st.checkbox("Grid Bot aktivieren", True, on_change=bump_settings_revision)
         bot_params = {}
         bot_run_triggered = False
 
         if enable_bot:
             
-            # Dynamische Preisgrenzen – immer sichtbar
-            coin_display = st.session_state.get("coin_input", "BTC")
-            default_lower = st.session_state.get("lower_price", 90000.0)
-            default_upper = st.session_state.get("upper_price", 130000.0)
-
-            col1, col2 = st.columns(2)
-            with col1:
-                bot_params["lower_price"] = st.number_input(
-                    "Unterer Preis", 0.0001, value=default_lower, format="%.4f"
-                )
-            with col2:
-                bot_params["upper_price"] = st.number_input(
-                    "Oberer Preis", 0.0001, value=default_upper, format="%.4f"
-                )
-
-            if st.session_state.get("close_price"):
-                st.caption(
-                    f"💡 Voreingestellter Preisbereich basiert auf dem Kurs von COIN +/- 20 % "
-                    f"({st.session_state['close_price']:,.2f} USDT)"
-                )
+            # Bot-Parameter als Formular: Eingaben lösen erst mit "Grid Bot starten" einen
+            # Rerun (und die Simulation) aus, nicht bei jedem Tastendruck oder Slider-Schritt
+            with st.form("bot_form", border=False):
+                # Dynamische Preisgrenzen – immer sichtbar
+                coin_display = st.session_state.get("coin_input", "BTC")
+                default_lower = st.session_state.get("lower_price", 90000.0)
+                default_upper = st.session_state.get("upper_price", 130000.0)
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    bot_params["lower_price"] = st.number_input(
+                        "Unterer Preis", 0.0001, value=default_lower, format="%.4f"
+                    )
+                with col2:
+                    bot_params["upper_price"] = st.number_input(
+                        "Oberer Preis", 0.0001, value=default_upper, format="%.4f"
+                    )
+
+                if st.session_state.get("close_price"):
+                    st.caption(
+                        f"💡 Voreingestellter Preisbereich basiert auf dem Kurs von COIN +/- 20 % "
+                        f"({st.session_state['close_price']:,.2f} USDT)"
+                    )
 
 
             
-            # # Default price setup
-            # default_price = None
-            # if "df" in st.session_state and not st.session_state["df"].empty:
-            #     default_price = st.session_state["df"].iloc[0]["close"]
-            # else:
-            #     default_price = 100000.0
-
-            # bot_params["total_investment"] = st.number_input("Investitionsbetrag (USDT)", 10.0, value=10000.0, step=100.0)
+                # # Default price setup
+                # default_price = None
+                # if "df" in st.session_state and not st.session_state["df"].empty:
+                #     default_price = st.session_state["df"].iloc[0]["close"]
+                # else:
+                #     default_price = 100000.0
+
+                # bot_params["total_investment"] = st.number_input("Investitionsbetrag (USDT)", 10.0, value=10000.0, step=100.0)
  
-            # bot_params["num_grids"] = st.slider("Anzahl Grids", 2, 500, 20)
+                # bot_params["num_grids"] = st.slider("Anzahl Grids", 2, 500, 20)
 
-            # # Zwei Optionen anzeigen
-            # slider_value = st.slider("Anzahl Grids - Wähle einen Wert", min_value=2, max_value=500, value=20)
-            # number_value = st.number_input("Oder gib den Wert direkt ein", min_value=2, max_value=500, value=slider_value)
+                # # Zwei Optionen anzeigen
+                # slider_value = st.slider("Anzahl Grids - Wähle einen Wert", min_value=2, max_value=500, value=20)
+                # number_value = st.number_input("Oder gib den Wert direkt ein", min_value=2, max_value=500, value=slider_value)
 
-            # # Synchronisieren: wenn sich eines ändert, überschreibt es das andere
-            # final_value = number_value if number_value != slider_value else slider_value
-            # bot_params["num_grids"] = final_value
+                # # Synchronisieren: wenn sich eines ändert, überschreibt es das andere
+                # final_value = number_value if number_value != slider_value else slider_value
+                # bot_params["num_grids"] = final_value
 
-            #st.write(f"Verwendeter Wert: {final_value}")
+                #st.write(f"Verwendeter Wert: {final_value}")
 
-            # Eingabe Anzahl Grids mit Slider und Number Input - bidirektionales Update
+                # Eingabe Anzahl Grids mit Slider und Number Input - bidirektionales Update
 
-            # st.subheader("Anzahl Grids")
-            # Initialwerte setzen (nur beim ersten Lauf)
-            if "num_grids" not in st.session_state:
-                st.session_state.num_grids = 20
-
-            # Callback-Funktionen definieren
-            def update_from_slider():
-                st.session_state.num_grids = st.session_state.slider_value
-
-            def update_from_number():
-                st.session_state.num_grids = st.session_state.number_value
-
-            # Slider mit Callback
-            st.slider(
-                "Anzahl Grids – wähle einen Wert",
-                min_value=2, max_value=500,
-                key="slider_value",
-                value=st.session_state.num_grids,
-                on_change=update_from_slider
-            )
-
-            # Number Input mit Callback
-            st.number_input(
-                "Oder gib den Wert direkt ein",
-                min_value=2, max_value=500,
-                key="number_value",
-                value=st.session_state.num_grids,
-                on_change=update_from_number
-            )
-
-            # Endgültiger Wert
-            bot_params["num_grids"] = st.session_state.num_grids
+                # st.subheader("Anzahl Grids")
+                # Initialwerte setzen (nur beim ersten Lauf)
+                # Im Formular gibt es keine Live-Synchronisation zwischen Slider und Eingabefeld,
+                # daher ein einzelnes Eingabefeld
+                bot_params["num_grids"] = st.number_input(
+                    "Anzahl Grids",
+                    min_value=2, max_value=500,
+                    value=20,
+                    key="num_grids"
+                )
 
 
 
 
 
-            grid_modes = {
-                "Arithmetisch (gleichmäßige Abstände)": "arithmetic",
-                "Geometrisch (prozentuale Abstände)": "geometric"
-            }
+                grid_modes = {
+                    "Arithmetisch (gleichmäßige Abstände)": "arithmetic",
+                    "Geometrisch (prozentuale Abstände)": "geometric"
+                }
 
-            grid_mode_label = st.radio("Grid Modus", list(grid_modes.keys()), index=0)
-            bot_params["grid_mode"] = grid_modes[grid_mode_label]
+                grid_mode_label = st.radio("Grid Modus", list(grid_modes.keys()), index=0)
+                bot_params["grid_mode"] = grid_modes[grid_mode_label]
 
-            bot_params["fee_rate"] = st.number_input("Handelsgebühren (%)", 0.0, value=0.1, step=0.01) / 100.0
+                bot_params["fee_rate"] = st.number_input("Handelsgebühren (%)", 0.0, value=0.1, step=0.01) / 100.0
 
-            reserve_pct = st.number_input("Betrag reserviert für Gebühren (%)", min_value=0.0, max_value=20.0, value=3.0, step=0.5, key="reserve_pct") / 100.0
-            bot_params["reserve_pct"] = reserve_pct
-#            fee_rate = bot_params["fee_rate"]
+                reserve_pct = st.number_input("Betrag reserviert für Gebühren (%)", min_value=0.0, max_value=20.0, value=3.0, step=0.5, key="reserve_pct") / 100.0
+                bot_params["reserve_pct"] = reserve_pct
+    #            fee_rate = bot_params["fee_rate"]
 
-            reserve_pct = bot_params.get("reserve_pct", 0.03)
-            fee_rate = bot_params.get("fee_rate", 0.001)
-            mode = bot_params.get("grid_mode", "arithmetic")
-            lower_price = bot_params.get("lower_price", 0)
-            upper_price = bot_params.get("upper_price", 0)
-            num_grids = bot_params.get("num_grids", 1)
+                reserve_pct = bot_params.get("reserve_pct", 0.03)
+                fee_rate = bot_params.get("fee_rate", 0.001)
+                mode = bot_params.get("grid_mode", "arithmetic")
+                lower_price = bot_params.get("lower_price", 0)
+                upper_price = bot_params.get("upper_price", 0)
+                num_grids = bot_params.get("num_grids", 1)
 
-            grid_range = ""
+                grid_range = ""
 
-            if lower_price > 0 and num_grids > 0 and upper_price > lower_price:
-                if mode == "arithmetic":
-                    grid_step = (upper_price - lower_price) / num_grids
+                if lower_price > 0 and num_grids > 0 and upper_price > lower_price:
+                    if mode == "arithmetic":
+                        grid_step = (upper_price - lower_price) / num_grids
 
-                    # unterstes Grid
-                    buy_low = lower_price
-                    sell_low = lower_price + grid_step
-                    raw_low = (sell_low - buy_low) / buy_low
-                    net_low = (raw_low * (1 - reserve_pct) - 2 * fee_rate) * 100
+                        # unterstes Grid
+                        buy_low = lower_price
+                        sell_low = lower_price + grid_step
+                        raw_low = (sell_low - buy_low) / buy_low
+                        net_low = (raw_low * (1 - reserve_pct) - 2 * fee_rate) * 100
 
-                    # oberstes Grid
-                    sell_high = upper_price
-                    buy_high = upper_price - grid_step
-                    raw_high = (sell_high - buy_high) / buy_high
-                    net_high = (raw_high * (1 - reserve_pct) - 2 * fee_rate) * 100
-                    st.session_state["net_grid_profit_pct"] = (net_high + net_low)/2
+                        # oberstes Grid
+                        sell_high = upper_price
+                        buy_high = upper_price - grid_step
+                        raw_high = (sell_high - buy_high) / buy_high
+                        net_high = (raw_high * (1 - reserve_pct) - 2 * fee_rate) * 100
+                        st.session_state["net_grid_profit_pct"] = (net_high + net_low)/2
 
-                    grid_range = f"{net_low:.2f} % – {net_high:.2f} %"
-                elif mode == "geometric":
-                    raw = (upper_price / lower_price) ** (1 / num_grids) - 1
-                    net = (raw * (1 - reserve_pct) - 2 * fee_rate) * 100
-                    st.session_state["net_grid_profit_pct"] = net
+                        grid_range = f"{net_low:.2f} % – {net_high:.2f} %"
+                    elif mode == "geometric":
+                        raw = (upper_price / lower_price) ** (1 / num_grids) - 1
+                        net = (raw * (1 - reserve_pct) - 2 * fee_rate) * 100
+                        st.session_state["net_grid_profit_pct"] = net
 
-                    grid_range = f"{net:.2f} %"
+                        grid_range = f"{net:.2f} %"
 
 
 
 
-            #reserve_pct = bot_params.get("reserve_pct", 0.03)
+                #reserve_pct = bot_params.get("reserve_pct", 0.03)
 
-            # grid_profit_pct = 0
-            # net_grid_profit_pct = 0
+                # grid_profit_pct = 0
+                # net_grid_profit_pct = 0
 
-            # if bot_params["lower_price"] > 0 and bot_params["num_grids"] > 0:
-            #     if bot_params["grid_mode"] == "arithmetic":
-            #         raw_return = (bot_params["upper_price"] - bot_params["lower_price"]) / bot_params["num_grids"]
-            #         raw_grid_pct = raw_return / bot_params["lower_price"]
-            #     elif bot_params["grid_mode"] == "geometric":
-            #         raw_grid_pct = (bot_params["upper_price"] / bot_params["lower_price"]) ** (1 / bot_params["num_grids"]) - 1
+                # if bot_params["lower_price"] > 0 and bot_params["num_grids"] > 0:
+                #     if bot_params["grid_mode"] == "arithmetic":
+                #         raw_return = (bot_params["upper_price"] - bot_params["lower_price"]) / bot_params["num_grids"]
+                #         raw_grid_pct = raw_return / bot_params["lower_price"]
+                #     elif bot_params["grid_mode"] == "geometric":
+                #         raw_grid_pct = (bot_params["upper_price"] / bot_params["lower_price"]) ** (1 / bot_params["num_grids"]) - 1
 
-            #     # Bruttogewinn auf 100 % bezogen (ohne Fees)
-            #     grid_profit_pct = raw_grid_pct * (1 - reserve_pct) * 100
+                #     # Bruttogewinn auf 100 % bezogen (ohne Fees)
+                #     grid_profit_pct = raw_grid_pct * (1 - reserve_pct) * 100
 
-            #     # Nettogewinn nach Trading-Fees (doppelt pro Grid)
-            #     net_grid_profit_pct = (raw_grid_pct * (1 - reserve_pct) - 2 * fee_rate) * 100
+                #     # Nettogewinn nach Trading-Fees (doppelt pro Grid)
+                #     net_grid_profit_pct = (raw_grid_pct * (1 - reserve_pct) - 2 * fee_rate) * 100
 
-            # st.sidebar.markdown(f"""
-            # <div style='font-size: 0.875rem; line-height: 1.4; margin-top: 10px;'>
-            # <b>📈 Gewinn pro Grid (nach Fees):</b> 
-            # {grid_profit_pct:.2f} %
-            # </div>
-            # """, unsafe_allow_html=True)
+                # st.sidebar.markdown(f"""
+                # <div style='font-size: 0.875rem; line-height: 1.4; margin-top: 10px;'>
+                # <b>📈 Gewinn pro Grid (nach Fees):</b> 
+                # {grid_profit_pct:.2f} %
+                # </div>
+                # """, unsafe_allow_html=True)
  
-            # Farb-/Symbol-Logik auf Basis der unteren Grenze
-            value_for_rating = net_low if mode == "arithmetic" else net
-            symbol = "⚠️"
-            color = "orange"
-
-            if value_for_rating >= 1.0:
-                color = "#00FF66"
-                symbol = "🔺"
-            elif value_for_rating < 0.3:
-                color = "#FF4D4D"
-                symbol = "🔻"
-
-            # Anzeige in der Sidebar
-            st.sidebar.markdown(f"""
-            <div style='font-size: 0.875rem; line-height: 1.4; margin-top: 10px; color: {color};'>
-            <b>{symbol} Gewinn pro Grid (nach Fees):</b><br>
-            {grid_range}
-            </div>
-            """, unsafe_allow_html=True)
+                # Farb-/Symbol-Logik auf Basis der unteren Grenze
+                value_for_rating = net_low if mode == "arithmetic" else net
+                symbol = "⚠️"
+                color = "orange"
+
+                if value_for_rating >= 1.0:
+                    color = "#00FF66"
+                    symbol = "🔺"
+                elif value_for_rating < 0.3:
+                    color = "#FF4D4D"
+                    symbol = "🔻"
+
+                # Anzeige in der Sidebar
+                st.sidebar.markdown(f"""
+                <div style='font-size: 0.875rem; line-height: 1.4; margin-top: 10px; color: {color};'>
+                <b>{symbol} Gewinn pro Grid (nach Fees):</b><br>
+                {grid_range}
+                </div>
+                """, unsafe_allow_html=True)
  
  
  
-            st.write("---")
-             # Default price setup
-            default_price = None
-            if "df" in st.session_state and not st.session_state["df"].empty:
-                default_price = st.session_state["df"].iloc[0]["close"]
-            else:
-                default_price = 100000.0
+                st.write("---")
+                 # Default price setup
+                default_price = None
+                if "df" in st.session_state and not st.session_state["df"].empty:
+                    default_price = first_last_close(st.session_state["df"])[0]
+                else:
+                    default_price = 100000.0
 
-            bot_params["total_investment"] = st.number_input("Investitionsbetrag (USDT)", 10.0, value=10000.0, step=100.0)
+                bot_params["total_investment"] = st.number_input("Investitionsbetrag (USDT)", 10.0, value=10000.0, step=100.0)
 
  
-           # Show fee reserves - neu
-            reserve_usdt = bot_params["total_investment"] * (bot_params["reserve_pct"] * 1/3)
-            reserve_coin_value = bot_params["total_investment"] * (bot_params["reserve_pct"] * 2/3)
-            if st.button("Grid Bot starten"):
-                bot_run_triggered = True
+               # Show fee reserves - neu
+                reserve_usdt = bot_params["total_investment"] * (bot_params["reserve_pct"] * 1/3)
+                reserve_coin_value = bot_params["total_investment"] * (bot_params["reserve_pct"] * 2/3)
+                bot_run_triggered = st.form_submit_button("Grid Bot starten", on_click=bump_settings_revision)
 
     # Return settings based on mode
     if use_simulated:
@@ -361,9 +442,6 @@ def get_user_settings():
             "simulation_initial_price": init_price,
             "simulation_days": sim_days,
             "simulation_volatility": volatility,
-            "chart_type": chart_type,
-            "show_volume": show_volume,
-            "show_grid_lines": show_grid_lines,  # NEW: Grid toggle state
             "enable_bot": enable_bot,
             "bot_params": bot_params,
             "bot_run_triggered": bot_run_triggered
@@ -375,32 +453,30 @@ def get_user_settings():
             "start_date": start_date,
             "end_date": end_date,
             "max_bars": max_bars,
-            "chart_type": chart_type,
-            "show_volume": show_volume,
-            "show_grid_lines": show_grid_lines,  # NEW: Grid toggle state
             "enable_bot": enable_bot,
             "bot_params": bot_params,
             "bot_run_triggered": bot_run_triggered
         }
 
 
+# Skalierungsfaktoren (Wurzel der Kerzen pro Monat/Jahr), einmal beim Import berechnet
+VOLATILITY_FACTORS = {
+    "1h": (np.sqrt(720), np.sqrt(8760)),
+    "4h": (np.sqrt(180), np.sqrt(2190)),
+    "1d": (np.sqrt(30), np.sqrt(365))
+}
+
+
 def calculate_annualized_volatility(df, interval):
     if "price_change" not in df or df["price_change"].isna().all():
         return None, None
 
-    std_pct = df["price_change"].std()  # % pro Intervall
-
-    interval_mapping = {
-        "1h":  {"monthly": 720, "yearly": 8760},
-        "4h":  {"monthly": 180, "yearly": 2190},
-        "1d":  {"monthly": 30,  "yearly": 365}
-    }
+    std_pct = candle_stats(df)["change_std"]  # % pro Intervall
 
-    if interval not in interval_mapping:
+    if interval not in VOLATILITY_FACTORS:
         return None, None
 
-    factor_month = np.sqrt(interval_mapping[interval]["monthly"])
-    factor_year = np.sqrt(interval_mapping[interval]["yearly"])
+    factor_month, factor_year = VOLATILITY_FACTORS[interval]
 
     vola_month = std_pct * factor_month
     vola_year = std_pct * factor_year
@@ -456,14 +532,33 @@ def render_colored_metric(col, label: str, value: float, unit: str = "%", overri
     """, unsafe_allow_html=True)
 
  
-def render_chart_and_metrics(df, symbol, interval, chart_type, show_volume, 
-                           grid_lines=None, trade_log=None, show_grid_lines=False,
-                           daily_values=None):  # NEW: show_grid_lines param
-    if df.empty:
-        st.warning("Keine Daten zum Anzeigen des Charts.")
-        return
-        
-    st.subheader(f"{symbol} {interval} Chart")
+# Statischer Teil des Chart-Layouts; pro Figure kommen nur Titel und Volumenachse hinzu.
+# Plotly kopiert die Werte beim Übernehmen, das Dict wird nicht verändert.
+CHART_LAYOUT = dict(
+    height=600,
+    yaxis_title="Preis (USDT)",
+    xaxis_title="Zeit",
+    template="plotly_dark",
+    xaxis=dict(type='date', tickformat='%d.%m', rangeslider_visible=False),
+    yaxis=dict(autorange=True, side='right'),
+    yaxis3=dict(
+        title="Portfolio (USDT)",
+        anchor="x",
+        overlaying="y",
+        side="left",
+        position=0.05,
+        showgrid=False
+    ),
+    margin=dict(l=50, r=50, t=80, b=100),
+    hovermode='x unified'
+)
+CANDLE_UP_COLOR = '#2ECC71'
+CANDLE_DOWN_COLOR = '#E74C3C'
+
+
+def build_chart_figure(df, symbol, interval, chart_type, show_volume,
+                       grid_lines=None, trade_log=None, show_grid_lines=False,
+                       daily_values=None):
     fig = go.Figure()
     
     # Plot main chart
@@ -474,14 +569,20 @@ def render_chart_and_metrics(df, symbol, interval, chart_type, show_volume,
             high=df['high'], 
             low=df['low'], 
             close=df['close'],
-            increasing_line_color='#2ECC71', 
-            decreasing_line_color='#E74C3C', 
+            increasing_line_color=CANDLE_UP_COLOR, 
+            decreasing_line_color=CANDLE_DOWN_COLOR, 
             name='Preis'
         ))
     else:
-        fig.add_trace(go.Scatter(
-            x=df['timestamp'], 
-            y=df['close'], 
+        # WebGL-Linie: ein Draw-Call statt SVG-Pfad, auch bei 1000 Kerzen flüssig.
+        # Lange Reihen per LTTB ausdünnen, damit weniger Punkte zum Browser gehen.
+        line_df = df
+        if len(df) > LINE_MAX_POINTS:
+            ts = df['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+            line_df = df.iloc[lttb_indices(ts, df['close'].to_numpy(), LINE_MAX_POINTS)]
+        fig.add_trace(go.Scattergl(
+            x=line_df['timestamp'], 
+            y=line_df['close'], 
             mode='lines', 
             name='Schlusskurs',
             line=dict(color='#3498DB', width=2)
@@ -489,9 +590,11 @@ def render_chart_and_metrics(df, symbol, interval, chart_type, show_volume,
     
     # Add volume if enabled
     if show_volume and 'volume' in df.columns:
+        # Volumen nur zur Anzeige: float32 halbiert das an den Browser gesendete Array.
+        # Preise bleiben float64, float32 verliert bei BTC-Kursen bereits die Cent-Stellen.
         fig.add_trace(go.Bar(
             x=df['timestamp'], 
-            y=df['volume'], 
+            y=df['volume'].to_numpy(dtype=np.float32), 
             name='Volumen', 
             marker_color='#7F8C8D', 
             yaxis='y2'
@@ -663,22 +766,26 @@ def render_chart_and_metrics(df, symbol, interval, chart_type, show_volume,
     
     # Add trade markers if trade log exists
     if trade_log and not df.empty:
-        trades_df = pd.DataFrame(trade_log)
-        buy_trades = trades_df[trades_df['type'] == 'BUY']
-        sell_trades = trades_df[trades_df['type'] == 'SELL']
+        trades_df = trade_log_frame(trade_log)
+        # Masken auf dem type-Array statt zwei gefilterter DataFrame-Kopien; Marker als WebGL-Trace
+        trade_ts = trades_df['timestamp'].to_numpy()
+        trade_px = trades_df['price'].to_numpy()
+        trade_type = trades_df['type'].to_numpy()
+        is_buy = trade_type == 'BUY'
+        is_sell = trade_type == 'SELL'
         
-        if not buy_trades.empty:
-            fig.add_trace(go.Scatter(
-                x=buy_trades['timestamp'],
-                y=buy_trades['price'],
+        if is_buy.any():
+            fig.add_trace(go.Scattergl(
+                x=trade_ts[is_buy],
+                y=trade_px[is_buy],
                 mode='markers',
                 marker=dict(color='green', size=10, symbol='triangle-up'),
                 name='BUY'
             ))
-        if not sell_trades.empty:
-            fig.add_trace(go.Scatter(
-                x=sell_trades['timestamp'],
-                y=sell_trades['price'],
+        if is_sell.any():
+            fig.add_trace(go.Scattergl(
+                x=trade_ts[is_sell],
+                y=trade_px[is_sell],
                 mode='markers',
                 marker=dict(color='red', size=10, symbol='triangle-down'),
                 name='SELL'
@@ -686,33 +793,55 @@ def render_chart_and_metrics(df, symbol, interval, chart_type, show_volume,
     
     # Configure layout
     fig.update_layout(
-        height=600,
+        CHART_LAYOUT,
         title=f"{symbol} {interval} Chart",
-        yaxis_title="Preis (USDT)",
-        xaxis_title="Zeit",
-        template="plotly_dark",
-        xaxis=dict(type='date', tickformat='%d.%m', rangeslider_visible=False),
-        yaxis=dict(autorange=True, side='right'),
         yaxis2=dict(overlaying='y', side='left', showgrid=False, visible=show_volume),
-        yaxis3=dict(
-            title="Portfolio (USDT)",
-            anchor="x",
-            overlaying="y",
-            side="left",
-            position=0.05,
-            showgrid=False
-        ),
-        margin=dict(l=50, r=50, t=80, b=100),
-        hovermode='x unified'
+        # Zoom/Pan bleibt nur erhalten, solange Symbol, Intervall und Datenfenster gleich
+        # sind; ein anderer Zeitraum oder max_bars setzt die Achsen zurück
+        uirevision=f"{symbol}_{interval}_{df['timestamp'].iat[0]}_{df['timestamp'].iat[-1]}"
     )
-    
+
+    return fig
+
+
+@st.fragment
+def render_chart(df, symbol, interval, grid_lines=None, trade_log=None, daily_values=None):
+    # Chart-Einstellungen liegen im Fragment: eine Änderung rendert nur den Chart neu,
+    # ohne Datenabruf, Sidebar und Simulation erneut auszuführen
+    col_type, col_volume, col_grid = st.columns([2, 1, 1])
+    chart_type = col_type.selectbox("Chart Typ", ["Candlestick", "Linie"], index=0, key="chart_type")
+    show_volume = col_volume.checkbox("Volumen anzeigen", True, key="show_volume")
+    show_grid_lines = col_grid.checkbox("Gridbereich anzeigen", False, key="show_grid_lines")
+
+    # Figure nur neu aufbauen, wenn sich Daten oder Chart-Parameter geändert haben
+    chart_params = (symbol, interval, chart_type, show_volume, show_grid_lines,
+                    tuple(grid_lines) if grid_lines else None)
+    fig = _cached_by_identity(
+        "_chart_cache", (df, trade_log, daily_values),
+        lambda: build_chart_figure(df, symbol, interval, chart_type, show_volume,
+                                   grid_lines=grid_lines, trade_log=trade_log,
+                                   show_grid_lines=show_grid_lines, daily_values=daily_values),
+        params=chart_params
+    )
+
     st.plotly_chart(fig, use_container_width=True, key=f"{symbol}_{interval}")
+
+
+def render_chart_and_metrics(df, symbol, interval, grid_lines=None, trade_log=None,
+                             daily_values=None):
+    if df.empty:
+        st.warning("Keine Daten zum Anzeigen des Charts.")
+        return
+        
+    st.subheader(f"{symbol} {interval} Chart")
+    render_chart(df, symbol, interval, grid_lines=grid_lines, trade_log=trade_log,
+                 daily_values=daily_values)
     
     
     # Display market metrics
     if not df.empty:
         st.subheader("📊 Marktdaten")
-        latest = df.iloc[-1]
+        first_close, last_close = first_last_close(df)
         
         results = st.session_state.get("results")
         buy_hold_return = None
@@ -720,18 +849,19 @@ def render_chart_and_metrics(df, symbol, interval, chart_type, show_volume,
         fee_ratio = None
 
         if results and df is not None and not df.empty:
-            initial = results.get('initial_price', df.iloc[0]['close'])
-            final = results.get('final_price', df.iloc[-1]['close'])
+            initial = results.get('initial_price', first_close)
+            final = results.get('final_price', last_close)
             buy_hold_return = (final - initial) / initial * 100
             bot_return = results.get('profit_pct', 0)
             fee_ratio = results.get('fees_paid', 0) / results.get('initial_investment', 1) * 100
         
         col1, col2, col3, col4, col5 = st.columns(5)
-        col1.metric("Aktueller Preis (USDT)", f"{latest['close']:,.2f}", f"{df['price_change'].iloc[-1]:,.2f} %" if 'price_change' in df else "-")
+        col1.metric("Aktueller Preis (USDT)", f"{last_close:,.2f}", f"{df['price_change'].iat[-1]:,.2f} %" if 'price_change' in df else "-")
         # col3.metric("Max Sim-Intervall (USDT)", f"{df['high'].max():,.2f}")
         # col3.metric("Min Sim-Intervall (USDT)", f"{df['low'].min():,.2f}")
-        min_price = df["low"].min()
-        max_price = df["high"].max()
+        stats = candle_stats(df)
+        min_price = stats["low_min"]
+        max_price = stats["high_max"]
         maxmin_perc = ((max_price - min_price) / min_price) * 100
         maxmin = ((max_price - min_price) ) 
         #col4.metric("Rendite Sim-Intervall (%)", f"{rendite:.2f} %")
@@ -744,8 +874,8 @@ def render_chart_and_metrics(df, symbol, interval, chart_type, show_volume,
             render_colored_metric(col4, "Max-Min im Sim-Intervall (USDT)", maxmin, "", override_color="white")
         if maxmin_perc is not None:
             render_colored_metric(col4, "Max-Min im Sim-Intervall (%)", maxmin_perc, override_color="white")
-        render_colored_metric(col3, "Max Sim-Intervall (USDT)", df['high'].max(), unit="", override_color="white")
-        render_colored_metric(col3, "Min Sim-Intervall (USDT)", df['low'].min(), unit="", override_color="white")
+        render_colored_metric(col3, "Max Sim-Intervall (USDT)", max_price, unit="", override_color="white")
+        render_colored_metric(col3, "Min Sim-Intervall (USDT)", min_price, unit="", override_color="white")
 
 
         
@@ -765,12 +895,12 @@ def render_chart_and_metrics(df, symbol, interval, chart_type, show_volume,
     st.write("")  # Trennlinie
 
     if not df.empty:
-        latest = df.iloc[-1]
+        stats = candle_stats(df)
         col1, col2, col3, col4, col5 = st.columns(5)
-        col1.metric("Avg Range pro Kerze (%)", f"{df['range'].mean():,.2f} %" if 'range' in df else "-")
-        col2.metric("Avg % Rendite pro Kerze", f"{df['price_change'].mean():,.4f} %" if 'price_change' in df else "-")
-        col3.metric("MAD % Rendite pro Kerze", f"{df['price_change'].abs().mean():,.4f} %" if 'price_change' in df else "-")
-        col4.metric("Vola % Rendite pro Kerze", f"{df['price_change'].std():,.4f} %" if 'price_change' in df else "-")
+        col1.metric("Avg Range pro Kerze (%)", f"{stats['range_mean']:,.2f} %" if 'range' in df else "-")
+        col2.metric("Avg % Rendite pro Kerze", f"{stats['change_mean']:,.4f} %" if 'price_change' in df else "-")
+        col3.metric("MAD % Rendite pro Kerze", f"{stats['change_mad']:,.4f} %" if 'price_change' in df else "-")
+        col4.metric("Vola % Rendite pro Kerze", f"{stats['change_std']:,.4f} %" if 'price_change' in df else "-")
         #col3.metric("Min Sim-Intervall", f"{df['low'].min():,.2f}")
         #col4.metric("Avg Range pro Kerze (%)", f"{df['range'].mean():,.2f} %" if 'range' in df else "-")
         #col5.metric("Avg Preisänderung pro Kerze (%)", f"{df['price_change'].mean():,.4f} %" if 'price_change' in df else "-")
@@ -784,9 +914,9 @@ def render_chart_and_metrics(df, symbol, interval, chart_type, show_volume,
                 st.subheader("📈 Projizierte Volatilität (hist.)")
                 col_vm, col_vm_coin, col_vy, col_vy_coin, col5 = st.columns(5)
                 col_vm.metric("Monatliche Vola", f"{vola_month:,.2f} %")
-                col_vm_coin.metric("Monatlich Std Coin (USDT)", f"{(vola_month / 100 * latest['close']):,.2f}")
+                col_vm_coin.metric("Monatlich Std Coin (USDT)", f"{(vola_month / 100 * last_close):,.2f}")
                 col_vy.metric("Jährliche Vola", f"{vola_year:,.2f} %")
-                col_vy_coin.metric("Jährlich Std Coin (USDT)", f"{(vola_year / 100 * latest['close']):,.2f}")
+                col_vy_coin.metric("Jährlich Std Coin (USDT)", f"{(vola_year / 100 * last_close):,.2f}")
 
 
     # col1, col2, col3, col4 = st.columns(4)
@@ -840,6 +970,29 @@ def render_entry(label, value, color="white", bold_label=True):
     """
 
 
+def build_trade_log_table(trade_log):
+    # Kein pandas Styler (erzeugt HTML pro Zelle): Formate kommen über column_config,
+    # das Vorzeichen des Profits über eine vorberechnete Symbolspalte
+    trade_df = trade_log_frame(trade_log).copy()
+
+    if 'profit' in trade_df.columns:
+        profit = trade_df['profit'].to_numpy(dtype=np.float64)
+        trade_df.insert(
+            trade_df.columns.get_loc('profit'), 'profit_sign',
+            np.where(profit > 0, '🟢', np.where(profit < 0, '🔴', ''))
+        )
+
+    return trade_df
+
+
+@st.fragment
+def render_candle_table(df):
+    # Tabelle nur übertragen, wenn sie eingeblendet ist (ein Expander sendet den Inhalt immer mit).
+    # Als Fragment: das Ein-/Ausblenden rendert nur die Tabelle neu, nicht die ganze Seite
+    if st.toggle("Vollständige Kursdaten anzeigen", value=False, key="show_candle_table"):
+        st.dataframe(candle_table(df), use_container_width=True)
+
+
 def display_bot_results(results, df=None):
     if not results:
         st.warning("No simulation results available")
@@ -872,8 +1025,9 @@ def display_bot_results(results, df=None):
     #    st.subheader("Performance Comparison")
         
         # Calculate metrics
-        initial = results.get('initial_price', df.iloc[0]['close'])
-        final = results.get('final_price', df.iloc[-1]['close'])
+        first_close, last_close = first_last_close(df)
+        initial = results.get('initial_price', first_close)
+        final = results.get('final_price', last_close)
         buy_hold_return = (final - initial) / initial * 100
         bot_return = results.get('profit_pct', 0)
         fee_ratio = results.get('fees_paid', 0) / results.get('initial_investment', 1) * 100
@@ -915,7 +1069,9 @@ def display_bot_results(results, df=None):
     col6.metric("Inv. Betrag pro Grid (USDT)", f"{grid_investment:,.2f}")
 
 
-    sell_trades = sum(1 for t in results.get('trade_log', []) if t['type'] == 'SELL')
+    trade_log = results.get('trade_log')
+    # Zählung auf dem gecachten Spalten-Frame statt einer Python-Schleife über alle Trades
+    sell_trades = int((trade_log_frame(trade_log)['type'].to_numpy() == 'SELL').sum()) if trade_log else 0
  
  
     col11, col12, col13,col14, col15 = st.columns(5)
@@ -950,7 +1106,7 @@ def display_bot_results(results, df=None):
     reserve_total = initial_investment * reserve_pct
     reserve_usdt = reserve_total * (1/3)
     reserve_coin_value = reserve_total * (2/3)
-    initial_price = results.get('initial_price', df.iloc[0]['close'] if df is not None else 1)
+    initial_price = results.get('initial_price', first_last_close(df)[0] if df is not None else 1)
     reserve_coin = reserve_coin_value / initial_price
 
 
@@ -1026,8 +1182,7 @@ def display_bot_results(results, df=None):
     # st.write(f"**Final Position:** {final_coin:,.6f} Coins + {final_usdt:,.2f} USDT = {results.get('final_value', 0):,.2f} USDT")
 
      # Show full data
-    with st.expander("Vollständige Kursdaten"):
-        st.dataframe(df[["timestamp", "open", "high", "low", "close", "volume", "range", "price_change"]], use_container_width=True)
+    render_candle_table(df)
  
     # Grid Configuration
     with st.expander("Grid Konfiguration"):
@@ -1044,31 +1199,14 @@ def display_bot_results(results, df=None):
     # Trade Log
     if results.get('trade_log'):
         with st.expander(f"Trade Log ({len(results['trade_log'])} Trades)"):
-            trade_df = pd.DataFrame(results['trade_log'])
-            
-            # Format numeric columns
-            styled_df = trade_df.style.format({
-                'cprice': '{:,.2f}',
-                'price': '{:,.2f}',
-                'amount': '{:.8f}',
-                'fee': '{:.4f}',
-                'profit': '{:.2f}' if 'profit' in trade_df.columns else None
-            })
-            
-            # Apply profit coloring
-            if 'profit' in trade_df.columns:
-                def color_profit(val):
-                    if val > 0: return 'color: green; font-weight: bold;'
-                    elif val < 0: return 'color: red; font-weight: bold;'
-                    return ''
-                styled_df = styled_df.applymap(color_profit, subset=['profit'])
-            
-            st.dataframe(styled_df, hide_index=True, 
+            trade_df = build_trade_log_table(results['trade_log'])
+            st.dataframe(trade_df, hide_index=True, 
                          column_config={
                              "timestamp": "Time",
                              "type": "Type",
-                             "cprice": st.column_config.NumberColumn("Trigger Price"),
-                             "price": st.column_config.NumberColumn("Grid Price"),
+                             "cprice": st.column_config.NumberColumn("Trigger Price", format="%.2f"),
+                             "price": st.column_config.NumberColumn("Grid Price", format="%.2f"),
+                             "profit_sign": st.column_config.TextColumn("", width="small"),
                              "amount": st.column_config.NumberColumn("Amount", format="%.8f"),
                              "fee": st.column_config.NumberColumn("Fee", format="%.4f"),
                              "profit": st.column_config.NumberColumn("Profit", format="%.2f"),
@@ -1189,6 +1327,14 @@ def display_bot_results(results, df=None):
 
 
 def plot_simulation_pattern(df, pattern):
+    # Figure nur neu aufbauen, wenn sich Daten oder Muster geändert haben
+    fig = _cached_by_identity("_pattern_chart_cache", df,
+                              lambda: build_simulation_pattern_figure(df, pattern), params=pattern)
+
+    st.plotly_chart(fig, use_container_width=True)
+
+
+def build_simulation_pattern_figure(df, pattern):
     """Generate explanation visualization for each pattern"""
     fig = go.Figure()
     title = pattern.replace("_", " ").title() + " Pattern"
@@ -1215,8 +1361,9 @@ def plot_simulation_pattern(df, pattern):
     
     elif pattern == 'sine':
         # Add horizontal lines showing expected buy/sell zones
-        mid_price = (df['close'].max() + df['close'].min()) / 2
-        amplitude = (df['close'].max() - df['close'].min()) / 2
+        close_max, close_min = df['close'].max(), df['close'].min()
+        mid_price = (close_max + close_min) / 2
+        amplitude = (close_max - close_min) / 2
         
         fig.add_hline(y=mid_price + amplitude*0.7, line_dash="dot", 
                      annotation_text="SELL Zone", annotation_position="right top")
@@ -1327,5 +1474,5 @@ def plot_simulation_pattern(df, pattern):
         yaxis_title="Price",
         margin=dict(l=50, r=50, t=80, b=50)
     )
-    
-    st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+
+    return fig
@@ -1,28 +1,240 @@
+import threading
+import time
+import diskcache
+import orjson
 import requests
 import pandas as pd
 import numpy as np
-from datetime import datetime, timezone
-
-def fetch_bitget_candles(coin, interval, start_date, end_date, max_bars, **kwargs):
-    interval_mapping = {
-        "1m": "1min",
-        "5m": "5min",
-        "15m": "15min",
-        "1h": "1h",
-        "4h": "4h",
-        "1d": "1day"
-    }
-    period = interval_mapping.get(interval)
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from pathlib import Path
+from types import MappingProxyType
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def _create_session():
+    # Eine Session pro Prozess: Keep-Alive spart den TCP/TLS-Handshake bei jedem Abruf
+    session = requests.Session()
+    session.headers.update({
+        "User-Agent": "Mozilla/5.0",
+        "Accept": "application/json"
+    })
+    retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries))
+    return session
+
+
+_session = _create_session()
+
+# UI-Intervall → Bitget-Periode (v1 Spot API)
+INTERVAL_MAPPING = MappingProxyType({
+    "1m": "1min",
+    "5m": "5min",
+    "15m": "15min",
+    "1h": "1h",
+    "4h": "4h",
+    "1d": "1day"
+})
+
+# Kerzenlänge in Millisekunden (für das Aufteilen langer Abfragen)
+INTERVAL_MS = MappingProxyType({
+    "1m": 60_000,
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "1h": 60 * 60_000,
+    "4h": 4 * 60 * 60_000,
+    "1d": 24 * 60 * 60_000
+})
+
+# Bitget liefert höchstens 1000 Kerzen pro Anfrage; mehr wird in Zeitfenster
+# aufgeteilt und parallel abgerufen (begrenzt, um das Rate-Limit zu schonen)
+MAX_BARS_PER_REQUEST = 1000
+MAX_PARALLEL_REQUESTS = 4
+
+# Persistenter Kerzen-Cache (überlebt Server-Neustarts). Nur abgeschlossene Zeiträume
+# werden abgelegt, da sich deren Kerzen nicht mehr ändern.
+# CANDLE_CACHE_VERSION erhöhen, wenn sich das Format des DataFrames ändert.
+CANDLE_CACHE_VERSION = 2
+# Verzeichnis relativ zum Projekt (nicht zum Arbeitsverzeichnis); geöffnet wird erst beim
+# ersten Zugriff, damit ein Import (Tests, REPL) keine SQLite-Datei anlegt
+CANDLE_CACHE_DIR = Path(__file__).resolve().parent.parent / ".candle_cache"
+_disk_cache = None
+_disk_cache_lock = threading.Lock()
+
+
+def _get_disk_cache():
+    global _disk_cache
+    if _disk_cache is None:
+        with _disk_cache_lock:
+            if _disk_cache is None:
+                _disk_cache = diskcache.Cache(str(CANDLE_CACHE_DIR))
+    return _disk_cache
+
+# Zuletzt geladene offene Zeiträume (Ende heute) im Prozess; beim nächsten Abruf werden
+# nur die neuen Kerzen ab der letzten bekannten Kerze nachgeladen und angehängt
+LIVE_CACHE_SIZE = 32
+_live_frames = {}
+# Streamlit bedient Sessions in eigenen Threads; Entnehmen und Zurücklegen laufen unter
+# einem Lock. Der Abruf selbst liegt ausserhalb, damit ein langsamer Call andere nicht blockiert
+_live_frames_lock = threading.Lock()
+
+
+def fetch_bitget_candles_cached(coin, interval, start_date, end_date, max_bars,
+                                max_workers=MAX_PARALLEL_REQUESTS):
+    today_utc = datetime.now(timezone.utc).date()
+    if end_date >= today_utc:
+        live_key = (coin, interval, start_date, end_date, max_bars)
+        with _live_frames_lock:
+            previous = _live_frames.pop(live_key, None)
+        result = _extend_live_candles(previous, interval, max_bars) if previous else None
+        if result is None:
+            result = fetch_bitget_candles(coin, interval, start_date, end_date, max_bars,
+                                          max_workers=max_workers)
+        if result[2] is None:
+            with _live_frames_lock:
+                _live_frames[live_key] = result
+                if len(_live_frames) > LIVE_CACHE_SIZE:
+                    _live_frames.pop(next(iter(_live_frames)))
+        return result
+
+    key = ("bitget", CANDLE_CACHE_VERSION, coin, interval, start_date.isoformat(), end_date.isoformat(), max_bars)
+    hit = _get_disk_cache().get(key)
+    if hit is not None:
+        return hit
+
+    result = fetch_bitget_candles(coin, interval, start_date, end_date, max_bars, max_workers=max_workers)
+    if result[2] is None:
+        _get_disk_cache().set(key, result)
+    return result
+
+MS_PER_DAY = 86_400_000
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _date_to_ms(d):
+    # UTC-Mitternacht des Datums in Millisekunden, ohne datetime-Objekte
+    return (d.toordinal() - _EPOCH_ORDINAL) * MS_PER_DAY
+
+
+def _ms_bounds(start_date, end_date):
+    # Tagesgrenzen (UTC) in Millisekunden; Ende = letzte Millisekunde des Endtags
+    return _date_to_ms(start_date), _date_to_ms(end_date) + MS_PER_DAY - 1
+
+
+def _fetch_page(symbol, period, after, before, limit):
+    url = f"https://api.bitget.com/api/spot/v1/market/candles?symbol={symbol}&period={period}&after={after}&before={before}&limit={limit}"
+    try:
+        response = _session.get(url, timeout=15)
+        data = orjson.loads(response.content)
+
+        if data.get("code") != "00000":
+            return None, f"Bitget API-Fehler: {data.get('msg', 'Unbekannt')} (Code: {data.get('code')})"
+    except Exception as e:
+        return None, f"API-Fehler: {str(e)}"
+    return data.get("data") or [], None
+
+
+def _candles_to_frame(candles, dedupe=False):
+    first = candles[0]
+    if not isinstance(first, dict) or any(col not in first for col in ["ts", "open", "high", "low", "close"]):
+        return None, "Unerwartetes Datenformat der Bitget API."
+
+    # Nur benötigte Felder übernehmen; nicht genutzte Volumenfelder gar nicht erst anlegen
+    vol_cols = [col for col in ["usdtVol", "baseVol", "quoteVol"] if col in first]
+    frame = pd.DataFrame.from_records(candles, columns=["ts", "open", "high", "low", "close"] + vol_cols)
+
+    # Volumen: erstes nicht-leeres Feld aus usdtVol → baseVol → quoteVol, sonst "0"
+    if vol_cols:
+        # Auf dem Objekt-Array statt mit bfill, das bei komplett leeren Zeilen eine
+        # FutureWarning (Downcasting) auslöst
+        vols = frame[vol_cols].to_numpy(dtype=object)
+        present = pd.notna(vols) & (vols != "")
+        volume = vols[np.arange(len(vols)), present.argmax(axis=1)]
+        volume[~present.any(axis=1)] = "0"
+    else:
+        volume = "0"
+
+    df = frame[["ts", "open", "high", "low", "close"]].rename(columns={"ts": "timestamp"})
+    df["volume"] = volume
+    ts_ms = pd.to_numeric(df["timestamp"], errors="coerce")
+    if ts_ms.notna().all():
+        # Epoch-Millisekunden direkt als datetime64 interpretieren (naiv = UTC), ohne Parser
+        df["timestamp"] = ts_ms.to_numpy(dtype=np.int64).astype("datetime64[ms]").astype("datetime64[ns]")
+    else:
+        df["timestamp"] = pd.to_datetime(ts_ms, unit="ms")
+    price_cols = ["open", "high", "low", "close", "volume"]
+    try:
+        # Schneller Weg: alle Felder sind gültige Zahlen-Strings → ein einziger float64-Cast
+        df[price_cols] = df[price_cols].to_numpy(dtype=object).astype(np.float64)
+    except (TypeError, ValueError):
+        for col in price_cols:
+            df[col] = pd.to_numeric(df[col].astype(str).str.replace(",", "."), errors="coerce").astype(np.float64)
+
+    df = df.dropna(subset=["timestamp", "open", "high", "low", "close"])
+    if dedupe:
+        # Fenstergrenzen können je nach API-Auslegung doppelt geliefert werden
+        df = df.drop_duplicates(subset="timestamp")
+    # Bitget liefert bereits geordnete Kerzen → umdrehen statt sortieren, wenn möglich
+    if df["timestamp"].is_monotonic_decreasing:
+        df = df.iloc[::-1]
+    elif not df["timestamp"].is_monotonic_increasing:
+        df = df.sort_values("timestamp")
+    return df, None
+
+
+def _add_derived_columns(df):
+    # Kennzahlen direkt auf den float64-Arrays, ohne Zwischen-Series und Index-Abgleich
+    close = df["close"].to_numpy()
+    high = df["high"].to_numpy()
+    low = df["low"].to_numpy()
+    price_change = np.empty_like(close)
+    price_change[:1] = np.nan
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price_change[1:] = (close[1:] / close[:-1] - 1.0) * 100
+        price_range = np.where(low != 0, (high - low) / low * 100, np.nan)
+    df["price_change"] = price_change
+    df["range"] = price_range
+
+    return df
+
+
+def _extend_live_candles(previous, interval, max_bars):
+    # Liefert None, wenn ein vollständiger Abruf nötig ist (Lücke zu gross, Fehler)
+    symbol, old_df, _ = previous
+    step = INTERVAL_MS[interval]
+    now_ms = int(time.time() * 1000)
+    last_ms = int(old_df["timestamp"].iat[-1].value // 1_000_000)
+    if (now_ms - last_ms) // step >= MAX_BARS_PER_REQUEST:
+        return None
+
+    # Ab der letzten bekannten Kerze laden: sie war evtl. noch nicht abgeschlossen
+    page, error = _fetch_page(symbol, INTERVAL_MAPPING[interval], last_ms - 1, now_ms, MAX_BARS_PER_REQUEST)
+    if error:
+        return None
+    if not page:
+        return previous
+    new_df, error = _candles_to_frame(page)
+    if error:
+        return None
+
+    df = pd.concat([old_df[new_df.columns], new_df], ignore_index=True)
+    df = df.drop_duplicates(subset="timestamp", keep="last")
+    if not df["timestamp"].is_monotonic_increasing:
+        df = df.sort_values("timestamp")
+    df = df.iloc[-max_bars:].reset_index(drop=True)
+    return symbol, _add_derived_columns(df), None
+
+
+def fetch_bitget_candles(coin, interval, start_date, end_date, max_bars,
+                         max_workers=MAX_PARALLEL_REQUESTS, **kwargs):
+    period = INTERVAL_MAPPING.get(interval)
     if not period:
         return None, None, f"Ungültiges Intervall: {interval}"
 
     try:
-        start_dt = datetime.combine(start_date, datetime.min.time(), tzinfo=timezone.utc)
-        end_dt = datetime.combine(end_date, datetime.max.time(), tzinfo=timezone.utc)
-        now = datetime.now(timezone.utc)
-
-        start_ts = int(start_dt.timestamp() * 1000)
-        end_ts = min(int(end_dt.timestamp() * 1000), int(now.timestamp() * 1000))
+        start_ts, end_ts = _ms_bounds(start_date, end_date)
+        end_ts = min(end_ts, int(time.time() * 1000))
 
         if start_ts >= end_ts:
             return None, None, "Startdatum muss vor Enddatum liegen."
@@ -30,48 +242,36 @@ def fetch_bitget_candles(coin, interval, start_date, end_date, max_bars, **kwarg
         return None, None, f"Datumskonvertierungsfehler: {str(e)}"
 
     symbol = f"{coin}USDT_SPBL"
-    url = f"https://api.bitget.com/api/spot/v1/market/candles?symbol={symbol}&period={period}&after={start_ts}&before={end_ts}&limit={max_bars}"
-    headers = {
-        "User-Agent": "Mozilla/5.0",
-        "Accept": "application/json"
-    }
+    if max_bars <= MAX_BARS_PER_REQUEST:
+        windows = [(start_ts, end_ts, max_bars)]
+    else:
+        # Nur die letzten max_bars Kerzen, in Fenstern zu je MAX_BARS_PER_REQUEST
+        step = INTERVAL_MS[interval]
+        window_ms = MAX_BARS_PER_REQUEST * step
+        first_ts = max(start_ts, end_ts - max_bars * step)
+        windows = [(after, min(after + window_ms - 1, end_ts), MAX_BARS_PER_REQUEST)
+                   for after in range(first_ts, end_ts, window_ms)]
 
-    try:
-        response = requests.get(url, headers=headers, timeout=15)
-        data = response.json()
-
-        if data.get("code") != "00000":
-            return None, None, f"Bitget API-Fehler: {data.get('msg', 'Unbekannt')} (Code: {data.get('code')})"
-    except Exception as e:
-        return None, None, f"API-Fehler: {str(e)}"
+    if len(windows) == 1 or max_workers <= 1:
+        pages = [_fetch_page(symbol, period, *window) for window in windows]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(windows))) as executor:
+            pages = list(executor.map(lambda window: _fetch_page(symbol, period, *window), windows))
 
-    candles = data.get("data", [])
+    candles = []
+    for page, error in pages:
+        if error:
+            return None, None, error
+        candles.extend(page)
     if not candles:
         return None, None, "Keine Daten im gewählten Zeitraum."
 
-    processed = []
-    for c in candles:
-        try:
-            ts = c.get("ts")
-            o = c.get("open")
-            h = c.get("high")
-            l = c.get("low")
-            c_ = c.get("close")
-            v = c.get("usdtVol") or c.get("baseVol") or c.get("quoteVol") or "0"
-            if None in [ts, o, h, l, c_]: continue
-            processed.append({"timestamp": ts, "open": o, "high": h, "low": l, "close": c_, "volume": v})
-        except:
-            continue
-
-    df = pd.DataFrame(processed)
-    df["timestamp"] = pd.to_datetime(pd.to_numeric(df["timestamp"]), unit="ms", utc=True).dt.tz_convert(None)
-    for col in ["open", "high", "low", "close", "volume"]:
-        df[col] = pd.to_numeric(df[col].astype(str).str.replace(",", "."), errors="coerce")
-
-    df = df.dropna(subset=["timestamp", "open", "high", "low", "close"])
-    df = df.sort_values("timestamp")
-    df["price_change"] = df["close"].pct_change() * 100
-    df["range"] = (df["high"] - df["low"]) / df["low"].replace(0, np.nan) * 100
+    df, error = _candles_to_frame(candles, dedupe=len(windows) > 1)
+    if error:
+        return None, None, error
+    if len(windows) > 1:
+        # Fällt end_ts genau auf eine Kerze, enthält [first_ts, end_ts] max_bars + 1 Kerzen
+        df = df.iloc[-max_bars:]
 
-    return symbol, df, None
+    return symbol, _add_derived_columns(df), None
 
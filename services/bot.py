@@ -109,7 +109,8 @@ class GridBot:
         if mode == "geometric":
             ratio = (upper / lower) ** (1 / num)
             #lines = sorted([lower * (ratio ** i) for i in range(num + 1)])
-            lines = sorted([round(lower * (ratio ** i), 4) for i in range(num + 1)])
+            # Potenzen vektorisiert berechnen; nur das Runden auf 4 Stellen bleibt pro Wert
+            lines = sorted([round(price, 4) for price in (lower * ratio ** np.arange(num + 1)).tolist()])
 
         # DEBUG: Ausgabe auf Streamlit-Webseite, falls aktiv
         # try:
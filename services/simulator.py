@@ -3,11 +3,14 @@ import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 
-def generate_simulated_data(pattern='linear', days=7, initial_price=100000, volatility=5000):
+def generate_simulated_data(pattern='linear', days=7, initial_price=100000, volatility=5000, seed=0):
     """
     Generate simulated price data for testing grid bot mechanics
     Returns DataFrame with same structure as real market data
+    Same arguments (incl. seed) always yield the same prices
     """
+    rng = np.random.default_rng(seed)
+
     # Generate timestamps (hourly intervals)
     timestamps = [datetime.now() - timedelta(days=days) + timedelta(hours=i) 
                  for i in range(days * 24)]
@@ -30,21 +33,21 @@ def generate_simulated_data(pattern='linear', days=7, initial_price=100000, vola
     elif pattern == 'volatile':
         prices = [initial_price]
         for _ in range(1, len(timestamps)):
-            change = np.random.choice([-1, 1]) * volatility * np.random.uniform(0.1, 0.5)
+            change = rng.choice([-1, 1]) * volatility * rng.uniform(0.1, 0.5)
             prices.append(max(1000, prices[-1] + change))
     else:  # Default to random walk
         prices = [initial_price]
         for _ in range(1, len(timestamps)):
-            prices.append(prices[-1] + np.random.uniform(-volatility/2, volatility/2))
+            prices.append(prices[-1] + rng.uniform(-volatility/2, volatility/2))
     
     # Create realistic OHLCV data
     df = pd.DataFrame({
         'timestamp': timestamps,
         'open': prices,
-        'high': [p + abs(np.random.normal(0, volatility/50)) for p in prices],
-        'low': [p - abs(np.random.normal(0, volatility/50)) for p in prices],
+        'high': [p + abs(rng.normal(0, volatility/50)) for p in prices],
+        'low': [p - abs(rng.normal(0, volatility/50)) for p in prices],
         'close': prices,
-        'volume': [abs(np.random.normal(100, 50)) for _ in prices]
+        'volume': [abs(rng.normal(100, 50)) for _ in prices]
     })
     
     # Add technical features expected by our bot
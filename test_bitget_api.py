@@ -0,0 +1,137 @@
+# test_bitget_api.py
+import sys
+import os
+import types
+import warnings
+from datetime import date, datetime, timezone
+import numpy as np
+import pandas as pd
+import pytest
+
+# Fix import path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services import bitget_api
+
+STEP_MS = bitget_api.INTERVAL_MS["1h"]
+# Fester Zeitpunkt mitten in einer Stunde, damit die Fenstergrenzen nicht auf Kerzen fallen
+NOW_MS = int(datetime(2026, 10, 15, 12, 30, tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def install_fake_api(monkeypatch, now_ms):
+    clock = {"now": now_ms}
+    calls = []
+
+    def fake_fetch_page(symbol, period, after, before, limit):
+        calls.append((after, before, limit))
+        # Kerzen auf dem Stundenraster in [after, before], neueste zuerst, höchstens limit Stück
+        first = -(-after // STEP_MS) * STEP_MS
+        last = min(before, clock["now"]) // STEP_MS * STEP_MS
+        stamps = list(range(last, first - 1, -STEP_MS))[:limit]
+        page = []
+        for ts in stamps:
+            close = 100 + (ts // STEP_MS) % 97
+            if ts + STEP_MS > clock["now"]:
+                # Laufende Kerze ändert sich mit der Zeit
+                close += (clock["now"] - ts) / STEP_MS
+            page.append({"ts": str(ts), "open": "100", "high": str(close + 1), "low": "99",
+                         "close": str(close), "usdtVol": "10"})
+        return page, None
+
+    monkeypatch.setattr(bitget_api, "_fetch_page", fake_fetch_page)
+    monkeypatch.setattr(bitget_api, "time", types.SimpleNamespace(time=lambda: clock["now"] / 1000))
+    return clock, calls
+
+
+def test_paged_fetch_returns_max_bars(monkeypatch):
+    _, calls = install_fake_api(monkeypatch, NOW_MS)
+    symbol, df, error = bitget_api.fetch_bitget_candles("BTC", "1h", date(2026, 1, 1), date(2026, 10, 15), max_bars=2500)
+
+    assert error is None
+    assert len(calls) == 3
+    assert len(df) == 2500
+    assert df["timestamp"].is_unique
+    assert df["timestamp"].is_monotonic_increasing
+    assert (np.diff(df["timestamp"].to_numpy()) == np.timedelta64(STEP_MS, "ms")).all()
+
+
+def test_paged_fetch_trims_when_clock_hits_candle_boundary(monkeypatch):
+    # Auf der vollen Stunde liegt die Kerze von end_ts - max_bars * step noch im Fenster
+    install_fake_api(monkeypatch, NOW_MS - 30 * 60_000)
+    _, df, error = bitget_api.fetch_bitget_candles("BTC", "1h", date(2026, 1, 1), date(2026, 10, 15), max_bars=2500)
+
+    assert error is None
+    assert len(df) == 2500
+    assert df["timestamp"].iat[-1] == pd.Timestamp(NOW_MS - 30 * 60_000, unit="ms")
+
+
+@pytest.mark.parametrize("advance_ms", [5 * STEP_MS + 17 * 60_000, 5 * STEP_MS + 30 * 60_000])
+def test_live_extension_matches_refetch(monkeypatch, advance_ms):
+    clock, _ = install_fake_api(monkeypatch, NOW_MS)
+    args = ("BTC", "1h", date(2026, 1, 1), date(2026, 10, 15))
+    previous = bitget_api.fetch_bitget_candles(*args, max_bars=2500)
+
+    clock["now"] = NOW_MS + advance_ms
+    extended = bitget_api._extend_live_candles(previous, "1h", 2500)
+    refetched = bitget_api.fetch_bitget_candles(*args, max_bars=2500)
+
+    assert extended is not None
+    assert extended[1]["timestamp"].iat[-1] > previous[1]["timestamp"].iat[-1]
+    pd.testing.assert_frame_equal(extended[1].reset_index(drop=True), refetched[1].reset_index(drop=True))
+
+
+def candle(ts, close="100", **fields):
+    record = {"ts": str(ts), "open": "100", "high": "110", "low": "90", "close": close}
+    record.update(fields)
+    return record
+
+
+def test_candles_to_frame_casts_and_reverses():
+    records = [candle(3 * STEP_MS, "103", usdtVol="30"), candle(2 * STEP_MS, "102", usdtVol="20"),
+               candle(STEP_MS, "101", usdtVol="10")]
+    df, error = bitget_api._candles_to_frame(records)
+
+    assert error is None
+    assert df["timestamp"].dtype == "datetime64[ns]"
+    assert all(df[col].dtype == np.float64 for col in ["open", "high", "low", "close", "volume"])
+    assert df["timestamp"].is_monotonic_increasing
+    assert df["close"].tolist() == [101.0, 102.0, 103.0]
+    assert df["volume"].tolist() == [10.0, 20.0, 30.0]
+
+
+def test_candles_to_frame_fallback_parsing_drops_incomplete_rows():
+    records = [candle(4 * STEP_MS, "104,5", usdtVol="1,5"), candle(3 * STEP_MS, None, usdtVol="3"),
+               candle(2 * STEP_MS, "", usdtVol="2"), candle(STEP_MS, "101", usdtVol="1")]
+    df, error = bitget_api._candles_to_frame(records)
+
+    assert error is None
+    assert all(df[col].dtype == np.float64 for col in ["open", "high", "low", "close", "volume"])
+    assert df["timestamp"].tolist() == [pd.Timestamp(STEP_MS, unit="ms"), pd.Timestamp(4 * STEP_MS, unit="ms")]
+    assert df["close"].tolist() == [101.0, 104.5]
+    assert df["volume"].tolist() == [1.0, 1.5]
+
+
+def test_candles_to_frame_sorts_unordered_input():
+    records = [candle(2 * STEP_MS), candle(3 * STEP_MS), candle(STEP_MS)]
+    df, _ = bitget_api._candles_to_frame(records)
+
+    assert df["timestamp"].is_monotonic_increasing
+
+
+def test_candles_to_frame_volume_fallback():
+    records = [candle(4 * STEP_MS, usdtVol="4", baseVol="40", quoteVol="400"),
+               candle(3 * STEP_MS, usdtVol="", baseVol="30", quoteVol="300"),
+               candle(2 * STEP_MS, usdtVol="", baseVol="", quoteVol="200"),
+               candle(STEP_MS, usdtVol="", baseVol="", quoteVol="")]
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        df, error = bitget_api._candles_to_frame(records)
+
+    assert error is None
+    assert df["volume"].tolist() == [0.0, 200.0, 30.0, 4.0]
+
+
+def test_candles_to_frame_rejects_unexpected_format():
+    df, error = bitget_api._candles_to_frame([["1", "100", "110", "90", "100"]])
+
+    assert df is None
+    assert error
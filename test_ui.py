@@ -0,0 +1,43 @@
+# test_ui.py
+import sys
+import os
+import numpy as np
+import pytest
+
+# Fix import path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.ui import lttb_indices
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_lttb_keeps_endpoints_and_extremes(seed):
+    rng = np.random.default_rng(seed)
+    y = 50000 + rng.normal(size=3000).cumsum() * 100
+    x = np.arange(len(y), dtype=np.float64)
+    idx = lttb_indices(x, y, 500)
+
+    assert idx[0] == 0
+    assert idx[-1] == len(y) - 1
+    assert np.argmin(y) in idx
+    assert np.argmax(y) in idx
+    assert (np.diff(idx) > 0).all()
+    # n_out Punkte, plus höchstens Minimum und Maximum
+    assert 500 <= len(idx) <= 502
+
+
+def test_lttb_keeps_spike_between_buckets():
+    y = np.zeros(1000)
+    y[333] = 10.0
+    y[667] = -10.0
+    idx = lttb_indices(np.arange(1000), y, 10)
+
+    assert 333 in idx
+    assert 667 in idx
+
+
+@pytest.mark.parametrize("n_out", [100, 150])
+def test_lttb_returns_all_points_when_not_reducing(n_out):
+    y = np.linspace(0, 1, 100)
+    idx = lttb_indices(np.arange(100), y, n_out)
+
+    np.testing.assert_array_equal(idx, np.arange(100))